@@ -1,9 +1,8 @@
 # Python 2.7 and 3.5
 # Author: Christoph Schranz, Salzburg Research
 
-import sys, os
+import os
 import struct, time
-import ThreeMF
 
 
 class FileHandler():
@@ -27,11 +26,12 @@ class FileHandler():
                 objs = [{"Mesh": self.loadBinarySTL(f)}]
                 
         elif filetype == ".3mf":
-            
+            # ThreeMF needs zipfile and ElementTree, import it only for 3mf
+            import ThreeMF
             objs = ThreeMF.Read3mf(inputfile)
         else:
             print("File type is not supported.")
-            sys.exit()
+            return None
 
         return objs
 
@@ -59,7 +59,70 @@ class FileHandler():
         return mesh
 
 
+    def sweepCSV(self, results):
+        '''Format the results of a Sweep as CSV, one orientation per line.'''
+        lines = ["x,y,z,bottomA,overhangA,lineL,unprintability"]
+        for direction, bottomA, overhangA, lineL, F in results:
+            lines.append("%f,%f,%f,%f,%f,%f,%f" % (direction[0], direction[1],
+                         direction[2], bottomA, overhangA, lineL, F))
+        return "\n".join(lines) + "\n"
+
+    def binarySTLFaceCount(self, inputfile):
+        '''Reading the facet count from the header of a binary STL'''
+        with open(inputfile, "rb") as f:
+            f.seek(80)
+            return struct.unpack('<I', f.read(4))[0]
+
+    def isBinarySTL(self, inputfile):
+        '''Check if the file is a binary STL by its facet count and size'''
+        if os.path.splitext(inputfile)[1].lower() != ".stl":
+            return False
+        size = os.path.getsize(inputfile)
+        if size < 84:
+            return False
+        return size == 84 + 50*self.binarySTLFaceCount(inputfile)
+
+    def iterBinarySTL(self, inputfile, chunk_facets):
+        '''Reading mesh data from a binary STL in chunks of chunk_facets
+        facets, streamed from a memory map. Yields meshs in the format of
+        loadBinarySTL.'''
+        import mmap
+        with open(inputfile, "rb") as f:
+            mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            try:
+                faceCount = struct.unpack_from('<I', mm, 80)[0]
+                for start in range(0, faceCount, chunk_facets):
+                    mesh=list()
+                    for idx in range(start, min(start + chunk_facets, faceCount)):
+                        data = struct.unpack_from("<ffffffffffffH", mm, 84 + 50*idx)
+                        mesh.append([data[3], data[4], data[5]])
+                        mesh.append([data[6], data[7], data[8]])
+                        mesh.append([data[9], data[10], data[11]])
+                    yield mesh
+            finally:
+                mm.close()
+
+    def rotatebinSTLStream(self, R, inputfile, outputfile, chunk_facets):
+        '''Rotate a binary STL chunk by chunk and save it as binary STL,
+        only one chunk of facets is held in memory'''
+        faceCount = self.binarySTLFaceCount(inputfile)
+        with open(outputfile, "wb") as outfile:
+            outfile.write("Tweaked on {}".format(time.strftime("%a %d %b %Y %H:%M:%S")
+                                ).encode().ljust(79, b" ") + b"\n")
+            outfile.write(struct.pack("<I", faceCount))
+            for content in self.iterBinarySTL(inputfile, chunk_facets):
+                rotated_content=list(map(self.rotate_vert, content, [R]*len(content)))
+                tweaked = list()
+                for i in range(0, len(rotated_content), 3):
+                    facett = self.calc_nomal(rotated_content[i:i+3])
+                    tweaked.append(struct.pack("<ffffffffffffH", facett[0][0], facett[0][1],
+                                   facett[0][2], facett[1][0], facett[1][1], facett[1][2],
+                                   facett[2][0], facett[2][1], facett[2][2], facett[3][0],
+                                   facett[3][1], facett[3][2], 0))
+                outfile.write(b"".join(tweaked))
+
     def rotate3MF(self, *arg):
+        import ThreeMF
         ThreeMF.rotate3MF(*arg)
         
                   
@@ -0,0 +1,176 @@
+# Python 2.7 and 3.5
+# Author: Christoph Schranz, Salzburg Research
+
+import math
+import time
+from MeshTweaker import Tweak
+
+# Number of projections computed at once by the numpy kernel, small chunks
+# of directions keep the temporary arrays in the CPU cache.
+CHUNK_CELLS = 2**20
+
+
+def fibonacci_sphere(n):
+    '''Returning n almost uniformly distributed unit vectors on a sphere'''
+    golden_angle = math.pi * (3 - math.sqrt(5))
+    directions = list()
+    for i in range(n):
+        z = 1 - (2*i + 1) / float(n)
+        r = math.sqrt(1 - z*z)
+        theta = golden_angle * i
+        directions.append([r*math.cos(theta), r*math.sin(theta), z])
+    return directions
+
+
+class Sweep(Tweak):
+    """ The Sweep evaluates the target function of the Tweaker for a full
+    sphere of orientations instead of a handful of promising candidates.
+    The directions are placed on a Fibonacci sphere, n_directions sets the
+    resolution. Each direction is the tweaked z-axis, as in Tweak.Zn.
+
+    All directions are scored by a batched kernel. If numpy is available,
+     the facets are scored against a chunk of directions at once, otherwise
+     a plain Python loop without per-facet overhead is used.
+
+    Following attributes are supported:
+    The list .results in the format
+     [[direction, touching area, overhang, line length, unprintability],...]
+    And the attributes .v, .phi, .R, .Unprintability and .Zn of the best
+     direction, as in Tweak.
+        """
+    def __init__(self, mesh, n_directions=1000, CA=45, verbose=False):
+        if n_directions < 1:
+            raise ValueError("Sweep requires at least one direction")
+        if len(mesh) < 3:
+            raise ValueError("Sweep requires a mesh with at least one facet")
+        self.directions = fibonacci_sphere(n_directions)
+
+        sweep_time = time.time()
+        try:
+            import numpy
+        except ImportError:
+            numpy = None
+        if numpy is not None:
+            scores = self.lithograph_batch_numpy(numpy, mesh, self.directions, CA)
+        else:
+            scores = self.lithograph_batch(mesh, self.directions, CA)
+
+        self.results = list()
+        Unprintability = None
+        for direction, (bottomA, overhangA, lineL) in zip(self.directions, scores):
+            F = self.target_function(bottomA, overhangA, lineL)
+            self.results.append([direction, bottomA, overhangA, lineL, F])
+            if Unprintability is None or F < Unprintability:
+                Unprintability = F
+                bestside = [direction, bottomA, overhangA, lineL]
+        sweep_time = time.time() - sweep_time
+
+        if verbose:
+            print("Swept {} orientations with the {} kernel in {:2f} s".format(
+                  n_directions, "numpy" if numpy else "python", sweep_time))
+
+        [v,phi,R] = self.euler(bestside)
+        self.v=v
+        self.phi=phi
+        self.R=R
+        self.Unprintability = Unprintability
+        self.Zn=bestside[0]
+        return None
+
+
+    def lithograph_batch_numpy(self, np, mesh, directions, CA):
+        '''Calculating touching areas, overhangs and touching lines for all
+        directions, vectorized over facets and chunks of directions'''
+        alpha=-math.cos((90-CA)*math.pi/180)
+        V = np.asarray(mesh, dtype=float).reshape(-1, 3, 3)
+        A = np.round(np.cross(V[:,1]-V[:,0], V[:,2]-V[:,0]), 6)
+        norma = np.sqrt((A*A).sum(axis=1))
+        # The lowest vertex only depends on the distinct vertices
+        U = np.unique(V.reshape(-1, 3), axis=0)
+        # Facets with a small area vector are ignored by lithograph()
+        keep = norma >= 2
+        V0, V1, V2 = V[keep,0], V[keep,1], V[keep,2]
+        perim = (np.sqrt(((V1-V0)**2).sum(axis=1)) + np.sqrt(((V2-V0)**2).sum(axis=1))
+                 + np.sqrt(((V2-V1)**2).sum(axis=1)))
+        alpha_norma = alpha*norma[keep]
+        # All projections of a chunk of directions are one product with the
+        # vertices and area vectors of the kept facets, one row per direction
+        n_k = len(alpha_norma)
+        P = np.ascontiguousarray(np.concatenate([V0, V1, V2, A[keep]]).T)
+        UT = np.ascontiguousarray(U.T)
+
+        D_all = np.asarray(directions, dtype=float)
+        chunk = max(1, CHUNK_CELLS // max(1, 4*n_k, len(U)))
+        scores = list()
+        for start in range(0, len(D_all), chunk):
+            D = D_all[start:start+chunk]
+            touching_height = (D.dot(UT).min(axis=1) + 0.15)[:,None]
+
+            proj = D.dot(P)
+            p0, p1, p2 = proj[:,:n_k], proj[:,n_k:2*n_k], proj[:,2*n_k:3*n_k]
+            dot = proj[:,3*n_k:]
+            an = np.minimum(p0, p1)
+            np.minimum(an, p2, out=an)
+            amax = np.maximum(p0, p1, out=p0)
+            np.maximum(amax, p2, out=amax)
+
+            down = dot < alpha_norma
+            # ali of lithograph() in units of 1e-4, zero if not facing down
+            ali = np.abs(dot, out=dot)
+            ali *= 5000
+            np.rint(ali, out=ali)
+            ali *= down
+            downA = ali.sum(axis=1)
+            # A kept area vector is never equal to -n, so overhangs always
+            # get the 0.8 weighting of lithograph()
+            ali *= an > touching_height
+            overA = ali.sum(axis=1)
+            touch = np.less(amax, touching_height, out=down, where=down)
+            Overhang = 1 + 0.8e-4*overA
+            bottomA = 1 + 1e-4*(downA - overA)
+            LineL = 1 + touch.dot(perim)
+            scores += zip(bottomA.tolist(), Overhang.tolist(), LineL.tolist())
+        return scores
+
+
+    def lithograph_batch(self, mesh, directions, CA):
+        '''Calculating touching areas, overhangs and touching lines for all
+        directions in plain Python'''
+        alpha=-math.cos((90-CA)*math.pi/180)
+        facets = list()
+        for i in range(0, len(mesh) - 2, 3):
+            p0, p1, p2 = mesh[i], mesh[i+1], mesh[i+2]
+            v=[p1[0]-p0[0],p1[1]-p0[1],p1[2]-p0[2]]
+            w=[p2[0]-p0[0],p2[1]-p0[1],p2[2]-p0[2]]
+            a=[round(v[1]*w[2]-v[2]*w[1],6), round(v[2]*w[0]-v[0]*w[2],6), round(v[0]*w[1]-v[1]*w[0],6)]
+            norma=math.sqrt(a[0]*a[0] + a[1]*a[1] + a[2]*a[2])
+            perim = (math.sqrt(v[0]*v[0] + v[1]*v[1] + v[2]*v[2])
+                     + math.sqrt(w[0]*w[0] + w[1]*w[1] + w[2]*w[2])
+                     + math.sqrt((p2[0]-p1[0])**2 + (p2[1]-p1[1])**2 + (p2[2]-p1[2])**2))
+            facets.append((a, norma, p0, p1, p2, perim))
+
+        scores = list()
+        for n in directions:
+            time.sleep(0)  # Yield, so other threads get a bit of breathing space.
+            amin=min(p[0]*n[0]+p[1]*n[1]+p[2]*n[2] for p in mesh)
+            touching_height = amin+0.15
+            Overhang=1
+            bottomA=1
+            LineL=1
+            for a, norma, p0, p1, p2, perim in facets:
+                if norma < 2:
+                    continue
+                dot = a[0]*n[0] +a[1]*n[1] +a[2]*n[2]
+                if alpha*norma > dot:
+                    a1 = p0[0]*n[0] +p0[1]*n[1] +p0[2]*n[2]
+                    a2 = p1[0]*n[0] +p1[1]*n[1] +p1[2]*n[2]
+                    a3 = p2[0]*n[0] +p2[1]*n[1] +p2[2]*n[2]
+                    ali = round(abs(dot)/2, 4)
+                    if touching_height < min(a1,a2,a3):
+                        Overhang += 0.8 * ali
+                    else:
+                        bottomA += ali
+                        if max(a1,a2,a3) < touching_height:
+                            LineL += perim
+            scores.append((bottomA, Overhang, LineL))
+        return scores
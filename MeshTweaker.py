@@ -76,18 +76,7 @@ class Tweak:
         
         
         # target function
-        Unprintability = sys.maxsize
-        for orientation, bottomA, overhangA, lineL in liste:
-            F = self.target_function(bottomA, overhangA, lineL) # touching area: i[1], overhang: i[2], touching line i[3]
-            if F<Unprintability - 0.05:
-                Unprintability=F
-                bestside = [orientation, bottomA, overhangA, lineL]
-            if verbose:
-                print("  %-32s %-18s%-18s%-18s%-18s " %(str(orientation), round(bottomA,3), 
-                      round(overhangA,3),round(lineL,3), round(F,3)))
-            time.sleep(0)  # Yield, so other threads get a bit of breathing space.
-            
-           
+        bestside, Unprintability = self.best_orientation(liste, verbose)
            
         lit_time = time.time() - lit_time
         if verbose:
@@ -113,6 +102,22 @@ Time-stats of algorithm:
 
 
 
+    def best_orientation(self, liste, verbose):
+        '''Returning the orientation with the lowest unprintability and its value'''
+        Unprintability = sys.maxsize
+        bestside = None
+        for orientation, bottomA, overhangA, lineL in liste:
+            F = self.target_function(bottomA, overhangA, lineL) # touching area: i[1], overhang: i[2], touching line i[3]
+            if F<Unprintability - 0.05:
+                Unprintability=F
+                bestside = [orientation, bottomA, overhangA, lineL]
+            if verbose:
+                print("  %-32s %-18s%-18s%-18s%-18s " %(str(orientation), round(bottomA,3), 
+                      round(overhangA,3),round(lineL,3), round(F,3)))
+            time.sleep(0)  # Yield, so other threads get a bit of breathing space.
+        return bestside, Unprintability
+
+
     def target_function(self, touching, overhang, line):
         '''This function returns the printability with the touching area and overhang given.'''
         ABSLIMIT=100             # Some values for scaling the printability
@@ -217,8 +222,12 @@ Time-stats of algorithm:
 
     def area_cumulation(self, content, n):
         '''Searching best options out of the objects area vector field'''
-        if self.bi_algorithmic: best_n = 7
-        else: best_n = 5
+        orient = self.area_counter(content)
+        return self.top_areas(orient)
+
+
+    def area_counter(self, content):
+        '''Cumulating the area of all facets with the same normal'''
         orient = Counter()
         for li in content:       # Cumulate areavectors
             an = li[0]
@@ -227,7 +236,13 @@ Time-stats of algorithm:
             if A > 0:
                 an = [float("{:1.6f}".format(i/A, 6)) for i in an]
                 orient[tuple(an)] += A
+        return orient
 
+
+    def top_areas(self, orient):
+        '''Returning the normals with the biggest cumulated area'''
+        if self.bi_algorithmic: best_n = 7
+        else: best_n = 5
         time.sleep(0)  # Yield, so other threads get a bit of breathing space.
         top_n = orient.most_common(best_n)
         return [[[0.0,0.0,1.0], 0.0]] + [[list(el[0]), float("{:2f}".format(el[1]))] for el in top_n]
@@ -235,18 +250,35 @@ Time-stats of algorithm:
 
     def egde_plus_vertex(self, mesh, best_n):
         '''Searching normals or random edges with one vertice'''
+        orient = self.edge_vertex_counter(mesh)
+        return self.top_edge_vertex(orient, best_n)
+
+
+    def edge_vertex_counter(self, mesh, it=None):
+        '''Counting the normals of random edges with one vertice. The number
+        of iterations per vertex it is chosen by the size of the mesh if not given.'''
         vcount = len(mesh)
-        # Small files need more calculations
-        if vcount < 10000: it = 5
-        elif vcount < 25000: it = 2
-        else: it = 1           
+        if it is None:
+            it = self.edge_vertex_iterations(vcount)
         self.mesh = mesh
         lst = map(self.calc_random_normal, list(range(vcount))*it)
         lst = filter(lambda x: x is not None, lst)
         
         time.sleep(0)  # Yield, so other threads get a bit of breathing space.
         orient = Counter(lst)
-        
+        return orient
+
+
+    def edge_vertex_iterations(self, vcount):
+        '''Returning the iterations per vertex for a mesh with vcount vertices'''
+        # Small files need more calculations
+        if vcount < 10000: return 5
+        elif vcount < 25000: return 2
+        else: return 1
+
+
+    def top_edge_vertex(self, orient, best_n):
+        '''Returning the most frequent normals of random edges'''
         top_n = orient.most_common(best_n)
         top_n = filter(lambda x: x[1]>2, top_n)
 
@@ -0,0 +1,126 @@
+# Python 2.7 and 3.5
+# Author: Christoph Schranz, Salzburg Research
+
+import sys
+import time
+from collections import Counter
+from MeshTweaker import Tweak
+
+# Rough memory usage of one facet as Python lists while it is processed,
+# and of one entry in the orientation counters.
+FACET_BYTES = 1024
+ORIENTATION_BYTES = 256
+
+
+def memory_budget(memory):
+    '''Returning the chunk size in facets and the maximal number of counted
+    orientations for a memory budget given in MB. Half of the budget is used
+    for the facet chunk, a quarter for the orientation counters.'''
+    budget = memory * 1024 * 1024
+    chunk_facets = max(1, budget // 2 // FACET_BYTES)
+    max_orientations = max(100, budget // 4 // ORIENTATION_BYTES)
+    return int(chunk_facets), int(max_orientations)
+
+
+class StreamTweak(Tweak):
+    """ The StreamTweak finds the same orientation as the Tweak, but it never
+    holds more than one chunk of the mesh in memory.
+    Instead of a mesh, it requires a function chunks() that returns a new
+     iterator over the mesh in chunks of the Tweak mesh format, e.g.
+     FileHandler.iterBinarySTL. The mesh is streamed three times:
+     1. cumulating the area vectors (and random edges if bi_algorithmic),
+     2. searching the lowest vertex for each candidate orientation,
+     3. summing touching areas, overhangs and touching lines.
+    All of them are partial results per chunk that are merged afterwards.
+
+    facet_count is the number of facets of the whole mesh. It sets the
+     sampling rate of the random edges in the bi-algorithmic mode, as the
+     Tweak does for the whole mesh.
+
+    The orientation counters are pruned to their most common half if they
+     exceed max_orientations, so for meshs with very many different normals
+     the area cumulation is approximated.
+
+    The attributes .v, .phi, .R, .Unprintability and .Zn are the same as
+     of the Tweak.
+        """
+    def __init__(self, chunks, bi_algorithmic, verbose, CA=45, n=[0,0,-1],
+                 max_orientations=100000, facet_count=None):
+
+        self.bi_algorithmic = bi_algorithmic
+        self.max_orientations = max_orientations
+        # The random edges are sampled at the rate of the whole mesh
+        it = None
+        if facet_count is not None:
+            it = self.edge_vertex_iterations(3*facet_count)
+
+        ## Searching promising orientations
+        arcum_time = time.time()
+        orient = Counter()
+        edges = Counter()
+        for mesh in chunks():
+            content = self.arrange_mesh(mesh)
+            orient.update(self.area_counter(content))
+            orient = self.prune(orient)
+            if bi_algorithmic:
+                edges.update(self.edge_vertex_counter(mesh, it))
+                edges = self.prune(edges)
+        vars(self).pop("mesh", None)
+        orientations = self.top_areas(orient)
+        if bi_algorithmic:
+            orientations += self.top_edge_vertex(edges, 12)
+            orientations = self.remove_duplicates(orientations)
+        arcum_time = time.time() - arcum_time
+
+        candidates = [[0.0,0.0,1.0]] + [[float("{:6f}".format(-i)) for i in side[0]]
+                                        for side in orientations]
+        if verbose:
+            print("Examine {} orientations:".format(len(candidates)-1))
+            print("  %-32s %-18s%-18s%-18s%-18s " %("Area Vector:",
+            "Touching Area:", "Overhang:", "Line length:", "Unprintability:"))
+
+        ## Calculate the printability of each orientation
+        lit_time = time.time()
+        amins = [sys.maxsize] * len(candidates)
+        for mesh in chunks():
+            content = self.arrange_mesh(mesh)
+            for i, orientation in enumerate(candidates):
+                amins[i] = min(amins[i], self.approachvertex(content, orientation))
+
+        sums = [[0, 0, 0] for orientation in candidates]
+        for mesh in chunks():
+            content = self.arrange_mesh(mesh)
+            for i, orientation in enumerate(candidates):
+                # lithograph() starts each sum with 1, count that only once
+                bottomA, overhangA, lineL = self.lithograph(content, orientation, amins[i], CA)
+                sums[i][0] += bottomA - 1
+                sums[i][1] += overhangA - 1
+                sums[i][2] += lineL - 1
+        liste = [[orientation, 1 + s[0], 1 + s[1], 1 + s[2]]
+                 for orientation, s in zip(candidates, sums)]
+
+        bestside, Unprintability = self.best_orientation(liste, verbose)
+        lit_time = time.time() - lit_time
+        if verbose:
+            print("""
+Time-stats of algorithm:
+  Area Cumulation:  \t{ac:2f} s
+  Lithography Time:  \t{lt:2f} s
+  Total Time:        \t{tot:2f} s
+""".format(ac=arcum_time, lt=lit_time, tot=arcum_time + lit_time))
+
+        [v,phi,R] = self.euler(bestside)
+        self.v=v
+        self.phi=phi
+        self.R=R
+        self.Unprintability = Unprintability
+        self.Zn=bestside[0]
+        return None
+
+
+    def prune(self, orient):
+        '''Keeping the most common half of the counted orientations if there
+        are more than max_orientations'''
+        if len(orient) <= self.max_orientations:
+            return orient
+        return Counter(dict(orient.most_common(self.max_orientations // 2)))
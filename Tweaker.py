@@ -1,9 +1,14 @@
 # Python 2.7 and 3.5
 # Author: Christoph Schranz, Salzburg Research
 
-## You can preset the default model in line 42
+## You can preset the default model in getargs()
 
-import sys, argparse
+## Library use: tweakMesh(mesh) and tweakFile(inputfile, outputfile).
+## Modules that are not needed for every job (argparse, multiprocessing,
+## hashlib, MeshSweeper, StreamTweaker, ThreeMF and numpy) are imported on
+## first use.
+
+import sys
 import os
 import time
 from MeshTweaker import Tweak
@@ -11,6 +16,7 @@ import FileHandler
 
 
 def getargs():
+    import argparse
     parser = argparse.ArgumentParser(description=
             "Orientation tool for better 3D prints")
     parser.add_argument('-vb', '--verbose', action="store_true",dest="verbose", 
@@ -31,7 +37,17 @@ def getargs():
     parser.add_argument('-r', '--result', action="store_true", dest="result",
                         help="show result of calculation and exit without creating output file",
                         default=False)                            
+    parser.add_argument('-s', '--sweep', action="store", dest="sweep", type=int,
+                        default=None, metavar="N",
+                        help="evaluate N uniformly distributed orientations and write them as csv")
+    parser.add_argument('-m', '--memory', action="store", dest="memory", type=int,
+                        default=0, metavar="MB",
+                        help="stream a binary STL in chunks, using about MB megabytes of memory")
     args = parser.parse_args()
+    if args.sweep is not None and args.sweep < 1:
+        parser.error("the number of sweep orientations must be at least 1")
+    if args.memory and (args.sweep or args.convert):
+        parser.error("the out-of-core mode -m can't be combined with -s or -c")
 
     if args.version:
         print("Tweaker 0.2.11, (22 Oktober 2016)")
@@ -45,7 +61,9 @@ def getargs():
             
         except:
             return None          
-    if not args.outputfile:
+    if not args.outputfile and args.sweep:
+        args.outputfile = os.path.splitext(args.inputfile)[0] + "_sweep.csv"
+    elif not args.outputfile:
         args.outputfile = os.path.splitext(args.inputfile)[0] + "_tweaked"
         args.outputfile += ".stl" #Because 3mf is not supported for output #TODO
 
@@ -60,20 +78,189 @@ demo object in verbose and bi-algorithmic mode. Use argument -h for help.
     return args
 
 
-if __name__ == "__main__":
+def meshHash(mesh):
+    '''Geometry hash of a mesh, identical meshes share the same hash'''
+    import hashlib, struct
+    data = [coord for vertex in mesh for coord in vertex]
+    return hashlib.sha1(struct.pack("<%dd" % len(data), *data)).hexdigest()
+
+
+def tweakWorker(job):
+    '''Tweak a single mesh, used by the worker pool of tweakObjects.
+    The verbose output is captured and returned with the result, so that
+    the parent can print it in the order of the objects.'''
+    mesh, bi_algorithmic, verbose, CA = job
+    log = ""
+    if verbose:
+        try:
+            from StringIO import StringIO
+        except ImportError:
+            from io import StringIO
+        stdout, sys.stdout = sys.stdout, StringIO()
+        try:
+            x = Tweak(mesh, bi_algorithmic, verbose, CA)
+        finally:
+            log, sys.stdout = sys.stdout.getvalue(), stdout
+    else:
+        x = Tweak(mesh, bi_algorithmic, verbose, CA)
+    # The mesh is kept by the bi-algorithmic mode, don't send it back
+    vars(x).pop("mesh", None)
+    return x, log
+
+
+def tweakMesh(mesh, bi_algorithmic=False, verbose=False, CA=45):
+    '''Tweak a single mesh in the vertex list format of FileHandler.loadMesh.
+    Returns the Tweak result with the attributes .R, .Zn, .Unprintability.'''
+    return Tweak(mesh, bi_algorithmic, verbose, CA)
+
+
+def tweakObjects(meshs, bi_algorithmic, verbose, CA=45):
+    '''Tweak all meshs concurrently on a worker pool. Identical meshs are
+    tweaked only once. Returns one Tweak result per mesh.'''
+    if len(meshs) <= 1:
+        return [tweakMesh(mesh, bi_algorithmic, verbose, CA) for mesh in meshs]
+    hashes = [meshHash(mesh) for mesh in meshs]
+    unique = dict()
+    for h, mesh in zip(hashes, meshs):
+        unique.setdefault(h, mesh)
+    keys = list(unique.keys())
+    jobs = [(unique[h], bi_algorithmic, verbose, CA) for h in keys]
+
+    if len(jobs) > 1:
+        import multiprocessing
+        pool = multiprocessing.Pool(min(len(jobs), multiprocessing.cpu_count()))
+        try:
+            results = pool.map(tweakWorker, jobs)
+        finally:
+            pool.close()
+            pool.join()
+    else:
+        results = list(map(tweakWorker, jobs))
+    results = dict(zip(keys, results))
+
+    if verbose:
+        first = dict()
+        for c, h in enumerate(hashes):
+            if h in first:
+                print("Object {}: identical to object {}, tweaked once\n".format(c, first[h]))
+            else:
+                first[h] = c
+                print("Object {}:".format(c))
+                print(results[h][1])
+    return [results[h][0] for h in hashes]
+
+
+def outfileName(outputfile, c, count):
+    '''Output file of the c-th object, numbered if there are several'''
+    if count <= 1:
+        return outputfile
+    return os.path.splitext(outputfile)[0]+" ({})".format(c)+os.path.splitext(outputfile)[1]
+
+
+def writeOutput(fileHandler, inputfile, outputfile, objs, rotations):
+    '''Write the rotated objects as ascii STL, one file per object, or all
+    transformations at once into a 3mf'''
+    if os.path.splitext(outputfile)[1].lower() in ["stl", ".stl"]:
+        for c, (obj, R) in enumerate(zip(objs, rotations)):
+            # If you want to write in binary, use the function rotatebinSTL(...)"
+            tweakedcontent=fileHandler.rotateSTL(R, obj["Mesh"], inputfile)
+            # Support structure suggestion can be used for further applications        
+            #if x.Unprintability > 7:
+            #    tweakedcontent+=" {supportstructure: yes}"
+            with open(outfileName(outputfile, c, len(objs)),'w') as outfile: # If you want to write in binary, open with "wb"
+                outfile.write(tweakedcontent)
+    else:
+        for obj, R in zip(objs, rotations):
+            obj["transform"] = "{} {} {} {} {} {} {} {} {} 0 0 1".format(R[0][0], R[0][1], R[0][2],
+                                R[1][0], R[1][1], R[1][2], R[2][0], R[2][1], R[2][2])
+        fileHandler.rotate3MF(inputfile, outputfile, objs)
+
+
+def tweakStream(inputfile, outputfile=None, bi_algorithmic=False, verbose=False,
+                CA=45, memory=256):
+    '''Tweak a binary STL out-of-core, using about memory MB. The rotated
+    object is written as binary STL, no output is written if outputfile is
+    None. Returns the StreamTweak result.'''
+    from StreamTweaker import StreamTweak, memory_budget
+    fileHandler = FileHandler.FileHandler()
+    chunk_facets, max_orientations = memory_budget(memory)
+    chunks = lambda: fileHandler.iterBinarySTL(inputfile, chunk_facets)
+    x = StreamTweak(chunks, bi_algorithmic, verbose, CA,
+                    max_orientations=max_orientations,
+                    facet_count=fileHandler.binarySTLFaceCount(inputfile))
+    if outputfile:
+        fileHandler.rotatebinSTLStream(x.R, inputfile, outputfile, chunk_facets)
+    return x
+
+
+def tweakFile(inputfile, outputfile=None, bi_algorithmic=False, verbose=False,
+              CA=45, convert=False, memory=None):
+    '''Tweak all objects of an STL or 3mf file and write the rotated output.
+    '_tweaked.stl' is the postfix of the output file by default. If memory is
+    set, a binary STL is tweaked out-of-core within about memory MB.
+    Returns one Tweak result per object, or None per object if convert is set.'''
+    if not outputfile:
+        outputfile = os.path.splitext(inputfile)[0] + "_tweaked.stl"
+    if memory and not convert:
+        if not FileHandler.FileHandler().isBinarySTL(inputfile):
+            print("Out-of-core mode requires a binary STL file.")
+            return None
+        return [tweakStream(inputfile, outputfile, bi_algorithmic, verbose, CA, memory)]
+    fileHandler = FileHandler.FileHandler()
+    objs = fileHandler.loadMesh(inputfile)
+    if objs is None:
+        return None
+    if convert:
+        tweaks = [None] * len(objs)
+        rotations = [[[1,0,0],[0,1,0],[0,0,1]]] * len(objs)
+    else:
+        tweaks = tweakObjects([obj["Mesh"] for obj in objs], bi_algorithmic, verbose, CA)
+        rotations = [x.R for x in tweaks]
+    writeOutput(fileHandler, inputfile, outputfile, objs, rotations)
+    return tweaks
+
+
+def printResult(x, cstime):
+    '''Print the result-stats of a Tweak'''
+    print("\nResult-stats:")
+    print(" Tweaked Z-axis: \t{}".format((x.Zn)))
+    print(" Axis, angle:   \t{v}, {phi}".format(v=x.v, phi=x.phi))
+    print(""" Rotation matrix: 
+            {:2f}\t{:2f}\t{:2f}
+            {:2f}\t{:2f}\t{:2f}
+            {:2f}\t{:2f}\t{:2f}""".format(x.R[0][0], x.R[0][1], x.R[0][2],
+                                          x.R[1][0], x.R[1][1], x.R[1][2], 
+                                          x.R[2][0], x.R[2][1], x.R[2][2]))
+    print(" Unprintability: \t{}".format(x.Unprintability))
+    
+    print("\nFound result:    \t{:2f} s".format(time.time()-cstime))
+
+
+def main():
     ## Get the command line arguments. Run in IDE for demo tweaking.
     stime=time.time()
-    try:
-        args = getargs()
-        if args is None:
+    args = getargs()
+    if args is None:
+        sys.exit()
+
+    ## Out-of-core mode, the mesh is never loaded at once
+    if args.memory:
+        if not FileHandler.FileHandler().isBinarySTL(args.inputfile):
+            print("Out-of-core mode requires a binary STL file.")
             sys.exit()
-    except:
-        raise
+        cstime = time.time()
+        x = tweakStream(args.inputfile, None if args.result else args.outputfile,
+                        args.bi_algorithmic, args.verbose, args.angle, args.memory)
+        if args.result or args.verbose:
+            printResult(x, cstime)
+        if args.verbose:
+            print("Tweaking took:  \t{:2f} s".format(time.time()-stime))
+            print("\nSuccessfully Rotated!")
+        sys.exit()
         
     try:
-        #print(args.inputfile)
-        FileHandler = FileHandler.FileHandler()
-        objs = FileHandler.loadMesh(args.inputfile)
+        fileHandler = FileHandler.FileHandler()
+        objs = fileHandler.loadMesh(args.inputfile)
         
         if objs is None:
             sys.exit()
@@ -85,60 +272,46 @@ if __name__ == "__main__":
     if args.verbose:
         print("Calculating the optimal orientation:\n  {}\n"
                         .format(args.inputfile.split("\\")[-1]))
-    c = 0
-    for obj in objs:
-        mesh = obj["Mesh"]
-        if args.convert:
-            R=[[1,0,0],[0,1,0],[0,0,1]]
-        else:
-            try:
-                cstime = time.time()
-                x=Tweak(mesh, args.bi_algorithmic, args.verbose, args.angle)
-                R=x.R
-            except (KeyboardInterrupt, SystemExit):
-                print("\nError, tweaking process failed!")
-                raise
-                
-            ## List tweaking results
-            if args.result or args.verbose:
-                print("\nResult-stats:")
-                print(" Tweaked Z-axis: \t{}".format((x.Zn)))
-                print(" Axis, angle:   \t{v}, {phi}".format(v=x.v, phi=x.phi))
-                print(""" Rotation matrix: 
-            {:2f}\t{:2f}\t{:2f}
-            {:2f}\t{:2f}\t{:2f}
-            {:2f}\t{:2f}\t{:2f}""".format(x.R[0][0], x.R[0][1], x.R[0][2],
-                                          x.R[1][0], x.R[1][1], x.R[1][2], 
-                                          x.R[2][0], x.R[2][1], x.R[2][2]))
+
+    if args.sweep:
+        from MeshSweeper import Sweep
+        for c, obj in enumerate(objs):
+            x=Sweep(obj["Mesh"], args.sweep, args.angle, args.verbose)
+            if args.verbose:
+                print(" Best Z-axis:    \t{}".format(x.Zn))
                 print(" Unprintability: \t{}".format(x.Unprintability))
-                
-                print("\nFound result:    \t{:2f} s".format(time.time()-cstime))
-                if args.result: 
-                    sys.exit()   
-          
-        ## Creating tweaked output file
-        if os.path.splitext(args.outputfile)[1].lower() in ["stl", ".stl"]:
-            # If you want to write in binary, use the function rotatebinSTL(...)"
-            tweakedcontent=FileHandler.rotateSTL(R, mesh, args.inputfile)       
-            # Support structure suggestion can be used for further applications        
-            #if x.Unprintability > 7:
-            #    tweakedcontent+=" {supportstructure: yes}"
-            if len(objs)<=1:
-                outfile = args.outputfile
-            else:
-                outfile = os.path.splitext(args.outputfile)[0]+" ({})".format(c)+os.path.splitext(args.outputfile)[1]
-            with open(outfile,'w') as outfile: # If you want to write in binary, open with "wb"
-                outfile.write(tweakedcontent)
+            with open(outfileName(args.outputfile, c, len(objs)),'w') as outfile:
+                outfile.write(fileHandler.sweepCSV(x.results))
 
-        else:
-            transformation = "{} {} {} {} {} {} {} {} {} 0 0 1".format(x.R[0][0], x.R[0][1], x.R[0][2],
-                                x.R[1][0], x.R[1][1], x.R[1][2], x.R[2][0], x.R[2][1], x.R[2][2])
-            obj["transform"] = transformation
-            FileHandler.rotate3MF(args.inputfile, args.outputfile, objs)
+    elif args.convert:
+        writeOutput(fileHandler, args.inputfile, args.outputfile, objs,
+                    [[[1,0,0],[0,1,0],[0,0,1]]] * len(objs))
 
-    
+    else:
+        try:
+            cstime = time.time()
+            tweaks = tweakObjects([obj["Mesh"] for obj in objs], args.bi_algorithmic,
+                                  args.verbose, args.angle)
+        except (KeyboardInterrupt, SystemExit):
+            print("\nError, tweaking process failed!")
+            raise
+
+        ## List tweaking results
+        if args.result or args.verbose:
+            for x in tweaks:
+                printResult(x, cstime)
+        if args.result:
+            sys.exit()
+
+        ## Creating tweaked output file
+        writeOutput(fileHandler, args.inputfile, args.outputfile, objs,
+                    [x.R for x in tweaks])
 
     ## Success message
     if args.verbose:
         print("Tweaking took:  \t{:2f} s".format(time.time()-stime))
         print("\nSuccessfully Rotated!")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+# Python 2.7 and 3.5
+# Author: Christoph Schranz, Salzburg Research
+
+## Startup benchmark of the library entry point, requires Python 3.7+ for
+## "python -X importtime". Run: python benchmark_startup.py
+
+import sys, os
+import subprocess
+
+# Target for the cumulative import time of Tweaker in milliseconds
+STARTUP_TARGET_MS = 20
+RUNS = 7
+# These modules must only be imported on first use
+LAZY_MODULES = ["argparse", "multiprocessing", "hashlib", "zipfile",
+                "xml.etree.ElementTree", "ThreeMF", "MeshSweeper", "StreamTweaker",
+                "mmap", "numpy"]
+
+
+def importtime(module):
+    '''Returning the cumulative import time of module in ms, the names
+    of all modules imported with it and the stderr of the import. The time
+    is None if the import failed.'''
+    curpath = os.path.dirname(os.path.realpath(__file__))
+    proc = subprocess.Popen([sys.executable, "-X", "importtime", "-c",
+                            "import {}".format(module)], cwd=curpath,
+                            stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+                            universal_newlines=True)
+    err = proc.communicate()[1]
+    cumulative = None
+    imported = list()
+    for line in err.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        cols = line[len("import time:"):].split("|")
+        name = cols[2].strip()
+        imported.append(name)
+        if name == module:
+            cumulative = int(cols[1]) / 1000.0
+    if proc.returncode != 0:
+        cumulative = None
+    return cumulative, imported, err
+
+
+if __name__ == "__main__":
+    times = list()
+    for i in range(RUNS):
+        cumulative, imported, err = importtime("Tweaker")
+        if cumulative is None:
+            print("import Tweaker failed:")
+            print("\n".join(line for line in err.splitlines()
+                            if not line.startswith("import time:")))
+            sys.exit(1)
+        times.append(cumulative)
+    best = min(times)
+    eager = [m for m in LAZY_MODULES if m in imported]
+
+    print("import Tweaker:  \t{:2f} ms (best of {}, target {} ms)".format(
+          best, RUNS, STARTUP_TARGET_MS))
+    if eager:
+        print("Eagerly imported:\t{}".format(", ".join(eager)))
+    if best > STARTUP_TARGET_MS or eager:
+        sys.exit(1)
+    print("Startup target met.")